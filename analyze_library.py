@@ -1,45 +1,131 @@
+import contextlib
+import csv
+import multiprocessing
 import os
 import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
 import librosa
-import pandas as pd
 import numpy as np
+import soundfile
+from scipy.signal import resample_poly
+from numba import njit, prange, set_num_threads
+from threadpoolctl import threadpool_limits
+from tqdm import tqdm
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
 # --- Configuration ---
 # This is the folder created by the organization script.
 LIBRARY_DIR = './Organized_Library_Final'
 # This is the output file where all your data will be saved.
 OUTPUT_CSV = 'sample_database.csv'
+# A compressed, typed copy for downstream analysis (written when pyarrow is installed).
+OUTPUT_PARQUET = 'sample_database.parquet'
+# File types that will be analyzed.
+AUDIO_EXTENSIONS = frozenset({'.wav', '.aif', '.mp3'})
+# Only the first few seconds are needed to characterize a sample.
+MAX_DURATION = 30
+# Audio is analyzed as mono at this rate, which halves the STFT work on
+# 44.1/48kHz files. Everything above 11kHz is dropped, so hats, cymbals and
+# other bright sounds lose much of their brightness, bandwidth and loudness.
+# The zero-crossing rate is counted per sample, so it roughly doubles for
+# 44.1kHz material. Databases built at a different rate can't be compared
+# with ones built at this one.
+SAMPLE_RATE = 22050
+# STFT settings shared by every spectral feature.
+N_FFT = 2048
+HOP_LENGTH = 512
 # --- End Configuration ---
 
+# RMS of the STFT window. Loudness is measured on the windowed spectrogram,
+# so dividing by this puts it on roughly the scale of librosa's rms(y=...).
+# The match is close for sustained sounds but only approximate for clicks
+# and other transients, which the window weights unevenly.
+_WINDOW_RMS = float(np.sqrt(np.mean(librosa.filters.get_window('hann', N_FFT) ** 2)))
+
+# Columns of the sample database and their types, in the order they are
+# written; the types become the Parquet schema
+COLUMN_DTYPES = {
+    'filename': 'string',
+    'category': 'string',
+    'pack': 'string',
+    'sample_name': 'string',
+    'bpm_from_name': 'string',
+    'key_from_name': 'string',
+    'computed_bpm': 'float32',
+    'brightness': 'float32',
+    'loudness_rms': 'float32',
+    'zero_crossing_rate': 'float32',
+    'spectral_bandwidth': 'float32',
+}
+COLUMNS = list(COLUMN_DTYPES)
+# Files handed to a worker per round-trip
+BATCH_SIZE = 16
+# How much of the next non-WAV file to pull into the page cache ahead of
+# time; WAVs are sized from their header instead
+PREFETCH_BYTES = 16 << 20
+# Push rows to disk every this many samples so a crash doesn't lose the run
+FLUSH_EVERY = 100
+# Rows per Parquet row group
+PARQUET_BATCH_SIZE = 10000
+# Arrow types for the database columns
+PARQUET_SCHEMA = pa.schema([
+    (column, pa.string() if dtype == 'string' else pa.float32()) for column, dtype in COLUMN_DTYPES.items()
+]) if pa else None
+
+# Regexes to find the bpm and key parts of the structured filenames. Each
+# matches a whole underscore-separated part that starts with the pattern.
+_BPM_RE = re.compile(r'(?<![^_])(\d{2,3})bpm[^_]*')
+_KEY_RE = re.compile(r'(?<![^_])([A-G][#b]?(maj|min)?)[^_]*')
+# Leading folder names that aren't a pack name
+_GENERIC_FOLDERS = frozenset({'SAMPLES', 'ONE-SHOTS'})
+
+# WAV sample formats that can be memory-mapped directly, keyed by
+# (format tag, bits per sample), with the scale that maps them to [-1, 1)
+_WAV_PCM = 1
+_WAV_FLOAT = 3
+_WAV_EXTENSIBLE = 0xFFFE
+_WAV_DTYPES = {
+    (_WAV_PCM, 16): (np.dtype('<i2'), 1.0 / 32768),
+    (_WAV_FLOAT, 32): (np.dtype('<f4'), 1.0),
+}
+
 def parse_filename(filename):
     """
     Parses the structured filename to extract metadata.
     Example: 'Ghosthack_AC2024_Kick_Base_95bpm_Cmaj.wav'
     """
-    parts = os.path.splitext(filename)[0].split('_')
+    stem = os.path.splitext(filename)[0]
     
     # Defaults
     pack_name = "Unknown"
     sample_name = "Unknown"
-    bpm = None
-    key = None
-
-    # Regex to find bpm and key
-    bpm_regex = re.compile(r'(\d{2,3})bpm')
-    key_regex = re.compile(r'([A-G][#b]?(maj|min)?)')
-
-    # Find BPM and Key and remove them from the parts list
-    remaining_parts = []
-    for part in parts:
-        if bpm_regex.match(part) and bpm is None: # take first bpm found
-            bpm = part
-        elif key_regex.match(part) and key is None: # take first key found
-            key = part
-        else:
-            remaining_parts.append(part)
+
+    # Find the first BPM and Key parts in one scan each
+    bpm_match = _BPM_RE.search(stem)
+    key_match = _KEY_RE.search(stem)
+    bpm = bpm_match.group(0) if bpm_match else None
+    key = key_match.group(0) if key_match else None
+
+    # Cut them out of the stem, last one first so the earlier span stays valid
+    spans = sorted((m.span() for m in (bpm_match, key_match) if m), reverse=True)
+    remaining_count = stem.count('_') + 1 - len(spans)
+    for start, end in spans:
+        # Take one neighbouring separator along with the part
+        if start > 0:
+            start -= 1
+        elif end < len(stem):
+            end += 1
+        stem = stem[:start] + stem[end:]
+    remaining_parts = stem.split('_') if remaining_count else []
     
     # If the first part is a generic folder name, ignore it.
-    if remaining_parts and remaining_parts[0].upper() in ['SAMPLES', 'ONE-SHOTS']:
+    if remaining_parts and remaining_parts[0].upper() in _GENERIC_FOLDERS:
         remaining_parts.pop(0)
 
     if len(remaining_parts) > 1:
@@ -51,116 +137,430 @@ def parse_filename(filename):
     return pack_name, sample_name, bpm, key
 
 
-def analyze_audio_file(filepath):
+def read_wav_layout(filepath):
+    """
+    Walks the RIFF chunks of a WAV file to find its sample data. Returns
+    (format_tag, bits, n_channels, sample_rate, block_align, data_offset,
+    n_frames) for any sample format, or None if the file isn't a WAV.
     """
-    Loads an audio file and extracts a set of acoustic features using librosa.
+    with open(filepath, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:] != b'WAVE':
+            return None
+
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+            if chunk_id == b'data':
+                break
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                f.seek(chunk_size % 2, os.SEEK_CUR)
+            else:
+                # Chunks are padded to an even number of bytes
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+        if fmt is None or len(fmt) < 16:
+            return None
+        format_tag, n_channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+        # WAVE_FORMAT_EXTENSIBLE keeps the real format tag at the start of its sub-format GUID
+        if format_tag == _WAV_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack('<H', fmt[24:26])[0]
+        if block_align == 0:
+            return None
+
+        # Streamed or truncated files can claim more data than they hold
+        data_offset = f.tell()
+        available = os.fstat(f.fileno()).st_size - data_offset
+        n_frames = min(chunk_size, available) // block_align
+
+    return format_tag, bits, n_channels, sample_rate, block_align, data_offset, n_frames
+
+
+def read_wav_header(filepath):
+    """
+    Returns (data_offset, n_frames, n_channels, sample_rate, dtype, scale)
+    for a WAV file, or None if it isn't 16-bit PCM or 32-bit float that can
+    be mapped as-is.
+    """
+    layout = read_wav_layout(filepath)
+    if layout is None:
+        return None
+    format_tag, bits, n_channels, sample_rate, block_align, data_offset, n_frames = layout
+
+    if (format_tag, bits) not in _WAV_DTYPES or n_channels == 0 or block_align != n_channels * bits // 8:
+        return None
+    if n_frames <= 0:
+        return None
+    dtype, scale = _WAV_DTYPES[format_tag, bits]
+
+    return data_offset, n_frames, n_channels, sample_rate, dtype, scale
+
+
+def read_wav_memmap(filepath, header):
+    """
+    Reads a WAV file described by read_wav_header() through a memory map,
+    so the OS page cache feeds the samples straight into the mono downmix.
+    """
+    data_offset, n_frames, n_channels, sr, dtype, scale = header
+    frames = min(n_frames, int(MAX_DURATION * sr))
+    samples = np.memmap(filepath, dtype=dtype, mode='r', offset=data_offset, shape=(frames, n_channels))
+
+    # The downmix is the only copy; it also converts to float32
+    y = samples.mean(axis=1, dtype=np.float32)
+    if scale != 1.0:
+        y *= scale
+    return y, sr
+
+
+def load_audio(filepath):
+    """
+    Reads at most MAX_DURATION seconds of a file as mono float32 at
+    SAMPLE_RATE. Plain PCM WAVs are memory-mapped, everything else goes
+    through soundfile, and librosa's audioread path is only used for formats
+    libsndfile can't decode.
+    """
+    header = read_wav_header(filepath) if os.path.splitext(filepath)[1].lower() == '.wav' else None
+
+    if header:
+        y, sr = read_wav_memmap(filepath, header)
+    else:
+        try:
+            info = soundfile.info(filepath)
+        except RuntimeError:
+            return librosa.load(filepath, sr=SAMPLE_RATE, mono=True, duration=MAX_DURATION, res_type='polyphase')
+
+        sr = info.samplerate
+        frames = min(info.frames, int(MAX_DURATION * sr))
+        y, _ = soundfile.read(filepath, frames=frames, dtype='float32', always_2d=False)
+
+        # Downmix stereo (or multichannel) to mono
+        if y.ndim > 1:
+            y = y.mean(axis=1)
+
+    # Polyphase resampling is much cheaper than librosa's default high-quality
+    # resampler and is plenty for these summary features.
+    if sr != SAMPLE_RATE:
+        ratio = np.gcd(sr, SAMPLE_RATE)
+        y = resample_poly(y, SAMPLE_RATE // ratio, sr // ratio).astype(np.float32, copy=False)
+
+    return y, SAMPLE_RATE
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def compute_spectral_features(S, freqs, n_fft):
+    """
+    Walks a magnitude spectrogram once and returns the mean spectral centroid,
+    spectral bandwidth and RMS energy across all frames. Matches librosa's
+    spectral_centroid, spectral_bandwidth (p=2) and rms(S=...) definitions.
+    """
+    n_bins, n_frames = S.shape
+    if n_frames == 0:
+        return 0.0, 0.0, 0.0
+
+    centroid_total = 0.0
+    bandwidth_total = 0.0
+    rms_total = 0.0
+
+    # librosa returns the STFT in Fortran order, so each column is contiguous.
+    for t in prange(n_frames):
+        weight = 0.0
+        weighted_freq = 0.0
+        power = 0.0
+        for k in range(n_bins):
+            mag = S[k, t]
+            weight += mag
+            weighted_freq += freqs[k] * mag
+            power += mag * mag
+
+        # Silent frames have no centroid or spread
+        if weight > 0.0:
+            centroid = weighted_freq / weight
+            spread = 0.0
+            for k in range(n_bins):
+                deviation = freqs[k] - centroid
+                spread += S[k, t] * deviation * deviation
+            centroid_total += centroid
+            bandwidth_total += np.sqrt(spread / weight)
+
+        # The DC and Nyquist bins are not mirrored in the one-sided spectrum
+        power -= 0.5 * S[0, t] * S[0, t]
+        if n_fft % 2 == 0:
+            power -= 0.5 * S[n_bins - 1, t] * S[n_bins - 1, t]
+        rms_total += np.sqrt(2.0 * power) / n_fft
+
+    return centroid_total / n_frames, bandwidth_total / n_frames, rms_total / n_frames
+
+
+def extract_features(y, sr):
+    """
+    Extracts a set of acoustic features from a mono signal using librosa.
     Returns a dictionary of features.
     """
     features = {}
+
+    # --- Feature Extraction ---
+
+    # Compute the magnitude spectrogram once and share it between features
+    S = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+    
+    # 1. Computed Tempo (BPM)
+    # Same mel dB spectrogram onset_strength(y=...) builds, from the shared STFT
+    mel = librosa.feature.melspectrogram(S=S**2, sr=sr)
+    onset_env = librosa.onset.onset_strength(S=librosa.power_to_db(mel), sr=sr)
+    # Only the tempo is kept, so skip beat_track's beat-position search
+    tempo = librosa.feature.tempo(onset_envelope=onset_env, sr=sr, hop_length=HOP_LENGTH)[0]
+    features['computed_bpm'] = np.round(tempo, 2)
+
+    # 2-3, 5. Brightness, frequency range and loudness in a single pass
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=N_FFT)
+    centroid, bandwidth, rms = compute_spectral_features(S, freqs, N_FFT)
+
+    # 2. Spectral Centroid (Brightness)
+    features['brightness'] = np.round(centroid, 2)
+
+    # 3. Spectral Bandwidth (Frequency Range)
+    features['spectral_bandwidth'] = np.round(bandwidth, 2)
+
+    # 4. Zero-Crossing Rate (Noisiness / Percussiveness)
+    # Only the overall rate is kept, so count sign changes over the whole
+    # signal instead of framing it first
+    crossings = np.count_nonzero(np.diff(np.signbit(y)))
+    features['zero_crossing_rate'] = np.round(crossings / max(len(y) - 1, 1), 4)
+
+    # 5. RMS Energy (Loudness)
+    # The Hann window scales the energy down by about 39%; undo it so the
+    # values stay close to databases built from the raw signal (approximate
+    # for transients, see _WINDOW_RMS)
+    features['loudness_rms'] = np.round(rms / _WINDOW_RMS, 4)
+
+    return features
+
+
+def analyze_audio_file(filepath):
+    """
+    Loads an audio file and extracts its acoustic features.
+    Returns a dictionary of features, or None if the file can't be processed.
+    """
     try:
         # Load audio file. Use a duration limit for efficiency on long files.
-        y, sr = librosa.load(filepath, sr=None, duration=30)
-
-        # --- Feature Extraction ---
-        
-        # 1. Computed Tempo (BPM)
-        onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-        tempo = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)[0]
-        features['computed_bpm'] = np.round(tempo, 2)
-
-        # 2. Spectral Centroid (Brightness)
-        spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)
-        features['brightness'] = np.round(np.mean(spectral_centroid), 2)
-
-        # 3. Spectral Bandwidth (Frequency Range)
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)
-        features['spectral_bandwidth'] = np.round(np.mean(spectral_bandwidth), 2)
-
-        # 4. Zero-Crossing Rate (Noisiness / Percussiveness)
-        zcr = librosa.feature.zero_crossing_rate(y)
-        features['zero_crossing_rate'] = np.round(np.mean(zcr), 4)
-
-        # 5. RMS Energy (Loudness)
-        rms = librosa.feature.rms(y=y)
-        features['loudness_rms'] = np.round(np.mean(rms), 4)
-        
+        y, sr = load_audio(filepath)
+        return extract_features(y, sr)
     except Exception as e:
         # Provide a more detailed error message
         print(f"Could not process {os.path.basename(filepath)}: {type(e).__name__} - {e}")
         return None
 
-    return features
+def walk_audio(base_dir):
+    """
+    Recursively yields a DirEntry for every audio file under base_dir, in the
+    same order as os.walk. Built on os.scandir so the file/folder checks reuse
+    the data from the directory read instead of a stat call per entry.
+    """
+    stack = [base_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue # Skip unreadable folders, like os.walk does
+
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                # Like os.walk, don't descend into symlinked folders
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                yield entry
+        stack.extend(reversed(subdirs))
+
+
+def init_worker():
+    """
+    Pool initializer, runs once in each child process. Pins the worker to a
+    single thread and warms up librosa's lazy caches and the Numba kernel so
+    the first real file doesn't pay for them.
+    """
+    # Each worker already owns a core, so keep BLAS and Numba from spawning
+    # their own threads on top of it.
+    set_num_threads(1)
+    threadpool_limits(limits=1)
+
+    # A failing initializer makes the pool respawn workers forever, so a
+    # broken warm-up must not escape; real files will report the error.
+    warmup_signal = np.random.default_rng(0).standard_normal(SAMPLE_RATE).astype(np.float32) * 0.1
+    try:
+        extract_features(warmup_signal, SAMPLE_RATE)
+    except Exception:
+        pass
+
+
+def analyze_task(task):
+    """
+    Analyzes one file and merges the result with the metadata collected
+    during the directory walk. Runs in a child process.
+    """
+    full_path, filename, category, pack, name, bpm, key = task
+
+    audio_features = analyze_audio_file(full_path)
+
+    if not audio_features:
+        return None
+
+    return {
+        'filename': filename,
+        'category': category,
+        'pack': pack,
+        'sample_name': name,
+        'bpm_from_name': bpm,
+        'key_from_name': key,
+        **audio_features # Unpack the dictionary of computed features
+    }
+
+def prefetch_file(filepath):
+    """
+    Pulls the part of a file that load_audio() will read into the OS page
+    cache, so it is already there by the time it gets analyzed. For WAVs that
+    is the header plus MAX_DURATION seconds of samples; other formats get a
+    fixed PREFETCH_BYTES.
+    """
+    try:
+        layout = read_wav_layout(filepath) if os.path.splitext(filepath)[1].lower() == '.wav' else None
+        if layout:
+            _, _, _, sample_rate, block_align, data_offset, n_frames = layout
+            length = data_offset + min(n_frames, int(MAX_DURATION * sample_rate)) * block_align
+        else:
+            length = PREFETCH_BYTES
+
+        with open(filepath, 'rb', buffering=0) as f:
+            # Let the kernel do the read-ahead where it can
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, length, os.POSIX_FADV_WILLNEED)
+                return
+
+            buffer = bytearray(1 << 20)
+            remaining = length
+            while remaining > 0:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                remaining -= read
+    except OSError:
+        pass # analyze_audio_file will report the problem
+
+
+def analyze_batch(batch):
+    """
+    Worker entry point: analyzes a batch of tasks in order while a background
+    thread reads the next file from disk, overlapping I/O with the CPU-bound
+    feature extraction. Returns one record (or None) per task.
+    """
+    records = []
+    with ThreadPoolExecutor(max_workers=1) as io_pool:
+        pending = io_pool.submit(prefetch_file, batch[0][0])
+        for i, task in enumerate(batch):
+            pending.result()
+            # Only ever one file ahead, so memory stays bounded
+            if i + 1 < len(batch):
+                pending = io_pool.submit(prefetch_file, batch[i + 1][0])
+            records.append(analyze_task(task))
+    return records
+
+def open_parquet_writer():
+    """
+    Opens the Parquet copy of the database, or a no-op context yielding None
+    when pyarrow isn't installed.
+    """
+    if pa is None:
+        return contextlib.nullcontext()
+    return pq.ParquetWriter(OUTPUT_PARQUET, PARQUET_SCHEMA, compression='zstd', compression_level=3)
+
+def write_parquet_batch(parquet_writer, rows):
+    """Writes the buffered records as one row group and empties the buffer."""
+    if rows:
+        parquet_writer.write_table(pa.Table.from_pylist(rows, schema=PARQUET_SCHEMA))
+        rows.clear()
 
 def main():
     """
-    Main function to walk through the library, analyze files,
+    Main function to walk through the library, analyze files in parallel,
     and save the results to a CSV.
     """
     if not os.path.exists(LIBRARY_DIR):
         print(f"Error: Directory not found at '{LIBRARY_DIR}'")
         return
 
-    all_samples_data = []
-    file_count = 0
+    tasks = []
     
     print("Starting sample analysis...")
 
-    # Walk through the organized library
-    for root, _, files in os.walk(LIBRARY_DIR):
-        for filename in files:
-            # FIX: Skip hidden macOS metadata files and other dotfiles
-            if filename.startswith('._') or filename.startswith('.'):
-                continue
-
-            if not filename.lower().endswith(('.wav', '.aif', '.mp3')):
-                continue
-            
-            file_count += 1
-            print(f"Analyzing ({file_count}): {filename}")
-            
-            full_path = os.path.join(root, filename)
-            
-            # --- 1. Get metadata from filename and path ---
-            category = os.path.basename(root)
-            pack, name, bpm, key = parse_filename(filename)
-            
-            # --- 2. Analyze the audio to get acoustic features ---
-            audio_features = analyze_audio_file(full_path)
-            
-            if audio_features:
-                # --- 3. Combine all data into one record ---
-                sample_record = {
-                    'filename': filename,
-                    'category': category,
-                    'pack': pack,
-                    'sample_name': name,
-                    'bpm_from_name': bpm,
-                    'key_from_name': key,
-                    **audio_features # Unpack the dictionary of computed features
-                }
-                all_samples_data.append(sample_record)
-
-    if not all_samples_data:
+    # --- 1. Walk the organized library and get metadata from filename and path ---
+    for entry in walk_audio(LIBRARY_DIR):
+        filename = entry.name
+        # FIX: Skip hidden macOS metadata files (._*) and other dotfiles
+        if filename[0] == '.':
+            continue
+
+        category = os.path.basename(os.path.dirname(entry.path))
+        pack, name, bpm, key = parse_filename(filename)
+        tasks.append((entry.path, filename, category, pack, name, bpm, key))
+
+    # Bail out before opening the outputs so an existing database survives
+    if not tasks:
         print("No audio files were processed. Exiting.")
         return
 
-    # --- 4. Create a DataFrame and save to CSV ---
-    print(f"\nAnalysis complete. Saving {len(all_samples_data)} samples to '{OUTPUT_CSV}'...")
-    df = pd.DataFrame(all_samples_data)
-    
-    # Reorder columns for clarity
-    column_order = [
-        'filename', 'category', 'pack', 'sample_name', 'bpm_from_name', 
-        'key_from_name', 'computed_bpm', 'brightness', 'loudness_rms', 
-        'zero_crossing_rate', 'spectral_bandwidth'
-    ]
-    # Ensure all columns exist before reordering
-    df_columns = [col for col in column_order if col in df.columns]
-    df = df[df_columns]
-    
-    df.to_csv(OUTPUT_CSV, index=False)
-    print("Successfully created the sample database!")
+    print(f"Found {len(tasks)} audio files. Analyzing on {os.cpu_count()} cores...")
+
+    # --- 2. Analyze the audio on every core and stream each record to the CSV ---
+    sample_count = 0
+    parquet_rows = []
+    with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f, \
+            open_parquet_writer() as parquet_writer, \
+            multiprocessing.Pool(os.cpu_count(), initializer=init_worker) as pool:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, lineterminator='\n')
+        writer.writeheader()
 
+        # Each worker pulls a batch of files per round-trip to amortize IPC.
+        # Rows are written in completion order, not walk order.
+        batches = [tasks[i:i + BATCH_SIZE] for i in range(0, len(tasks), BATCH_SIZE)]
+        progress = tqdm(total=len(tasks))
+        for records in pool.imap_unordered(analyze_batch, batches):
+            progress.update(len(records))
+            for sample_record in records:
+                if not sample_record:
+                    continue
+                writer.writerow(sample_record)
+                sample_count += 1
+                if sample_count % FLUSH_EVERY == 0:
+                    f.flush()
+
+                if parquet_writer:
+                    parquet_rows.append(sample_record)
+                    if len(parquet_rows) >= PARQUET_BATCH_SIZE:
+                        write_parquet_batch(parquet_writer, parquet_rows)
+        progress.close()
+
+        if parquet_writer:
+            write_parquet_batch(parquet_writer, parquet_rows)
+
+    if not sample_count:
+        os.remove(OUTPUT_CSV)
+        if pa is not None:
+            os.remove(OUTPUT_PARQUET)
+        print("No audio files were processed. Exiting.")
+        return
+
+    print(f"\nAnalysis complete. Saved {sample_count} samples to '{OUTPUT_CSV}'.")
+    if pa is not None:
+        print(f"A typed copy was also saved to '{OUTPUT_PARQUET}'.")
+    print("Successfully created the sample database!")
 
 if __name__ == '__main__':
     main()
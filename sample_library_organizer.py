@@ -1,6 +1,21 @@
+import errno
+import functools
 import os
 import shutil
 import re
+import sys
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# The name-cleanup patterns use atomic groups and possessive quantifiers,
+# which need the regex module or Python 3.11+
+try:
+    import regex as pattern_engine
+except ImportError:
+    pattern_engine = re if sys.version_info >= (3, 11) else None
 
 # --- Configuration ---
 # Point this to the folder containing ALL your raw samples.
@@ -9,21 +24,58 @@ SOURCE_BASE_DIR = './All_My_Samples'
 DEST_DIR = './Organized_Library_Final'
 # --- End Configuration ---
 
+# File types that will be organized
+AUDIO_EXTENSIONS = frozenset({'.wav', '.aif', '.mp3', '.mid'})
+
+# Patterns used for parsing and cleaning names, compiled once
+_BPM_WS_RE = re.compile(r'(\d{2,3})\s?bpm', re.IGNORECASE)
+_BPM_US_RE = re.compile(r'_(\d{2,3})_')
+_KEY_RE = re.compile(r'\b([A-G][#b]?)\s?(min|maj|minor|major)?\b', re.IGNORECASE)
+# Metadata markers stripped from sample names once they have been parsed.
+# Backtracking into the bpm digits or its space can never produce a match,
+# so they are possessive when the engine supports it. The key marker has to
+# stay backtracking: giving up the mode is how 'C#mint' still strips 'C#'.
+if pattern_engine:
+    _BPM_MARKER = r'\d{2,3}+\s?+bpm'
+else:
+    _BPM_MARKER = r'\d{2,3}\s?bpm'
+_KEY_MARKER = r'\b[A-G][#b]?\s?(?:min|maj|minor|major)?\b'
+_UNDERSCORE_KEY_MARKER = r'_\s?[A-G][#b]?\s?_'
+
+def compile_cleanup_pattern(markers):
+    """
+    Joins markers into one case-insensitive alternation. Once an alternative
+    has matched, the atomic group stops the engine from retrying the others.
+    """
+    alternation = '|'.join(markers)
+    if pattern_engine:
+        return pattern_engine.compile(f'(?>{alternation})', pattern_engine.IGNORECASE)
+    return re.compile(alternation, re.IGNORECASE)
+
+# One combined pattern per (bpm found, key found) pair so a name is cleaned in a single scan
+_CLEANUP_RES = {
+    (has_bpm, has_key): compile_cleanup_pattern(
+        ([_BPM_MARKER] if has_bpm else []) + ([_KEY_MARKER] if has_key else []) + [_UNDERSCORE_KEY_MARKER]
+    )
+    for has_bpm in (False, True)
+    for has_key in (False, True)
+}
+_WS_RE = re.compile(r'\s+')
+# Drops @!() and turns _ and - into spaces in one pass
+_NAME_CHARS = str.maketrans({'@': None, '!': None, '(': None, ')': None, '_': ' ', '-': ' '})
+
 def clean_name(name):
     """Removes special characters and extra spaces from a string."""
-    name = re.sub(r'[@!()]', '', name)
-    name = name.replace('_', ' ').replace('-', ' ')
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name
+    return _WS_RE.sub(' ', name.translate(_NAME_CHARS)).strip()
 
 def parse_metadata(path_string):
     """Parses a string to find BPM and musical key."""
     bpm, key = None, None
-    bpm_match = re.search(r'(\d{2,3})\s?bpm', path_string, re.IGNORECASE) or re.search(r'_(\d{2,3})_', path_string)
+    bpm_match = _BPM_WS_RE.search(path_string) or _BPM_US_RE.search(path_string)
     if bpm_match:
         bpm = f"{bpm_match.group(1)}bpm"
 
-    key_match = re.search(r'\b([A-G][#b]?)\s?(min|maj|minor|major)?\b', path_string, re.IGNORECASE)
+    key_match = _KEY_RE.search(path_string)
     if key_match:
         note = key_match.group(1).replace('b', 'b').replace('#', 's')
         mode = (key_match.group(2) or "").lower()
@@ -31,31 +83,66 @@ def parse_metadata(path_string):
 
     return bpm, key
 
+# Keywords for each category, grouped by the tag they set
+CATEGORY_KEYWORDS = {
+    'MIDI': ['midi'],
+    'STEMS': ['stem', '!stems'],
+    'DRUMS': ['kick', 'bd', 'snare', 'sd', 'hat', 'hh', 'clap', '808', 'tom', 'cymbal', 'cym', 'ride', 'crash'],
+    'PERCUSSION': ['perc', 'shaker', 'tamb', 'conga', 'bongo', 'clave', 'rim', 'block', 'timbale'],
+    'FX': ['fx', 'sfx', 'riser', 'fall', 'downer', 'whoosh', 'impact', 'hit', 'transition', 'sweep', 'braam', 'zap'],
+    'MELODIC': ['bass', 'synth', 'pad', 'lead', 'pluck', 'keys', 'piano', 'guitar', 'strings', 'vox', 'vocal', 'chord', 'arp'],
+    'AMBIENCE': ['ambience', 'amb', 'drone', 'texture'],
+    'LOOP': ['loop', 'bpm'],
+}
+
+def build_keyword_matcher():
+    """
+    Returns a function that finds which CATEGORY_KEYWORDS tags occur in a
+    lowercased string with a single scan, using an Aho-Corasick automaton
+    when pyahocorasick is installed.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for tag, keywords in CATEGORY_KEYWORDS.items():
+            for keyword in keywords:
+                automaton.add_word(keyword, tag)
+        automaton.make_automaton()
+        return lambda text: {tag for _, tag in automaton.iter(text)}
+
+    # Fall back to one alternation of every keyword. Wrapping it in a lookahead
+    # keeps matches zero-width, so overlapping keywords are all found too.
+    tag_by_keyword = {keyword: tag for tag, keywords in CATEGORY_KEYWORDS.items() for keyword in keywords}
+    alternation = '|'.join(re.escape(k) for k in sorted(tag_by_keyword, key=len, reverse=True))
+    keyword_re = re.compile(f'(?=({alternation}))')
+    return lambda text: {tag_by_keyword[m.group(1)] for m in keyword_re.finditer(text)}
+
+find_category_tags = build_keyword_matcher()
+
+@functools.lru_cache(maxsize=4096)
+def find_folder_tags(folder):
+    """Keyword tags of a lowercased folder path. Cached, since every file in the folder shares them."""
+    return frozenset(find_category_tags(folder))
+
 def get_category_from_path(path):
     """Determines the sample category using keyword lists."""
-    path_lower = path.lower()
+    # Keywords never contain '/', so the folder and the filename can be scanned separately
+    folder, _, filename = path.lower().rpartition('/')
+    tags = find_folder_tags(folder) | find_category_tags(filename)
 
-    # Define keywords for each category
-    DRUMS = ['kick', 'bd', 'snare', 'sd', 'hat', 'hh', 'clap', '808', 'tom', 'cymbal', 'cym', 'ride', 'crash']
-    PERCUSSION = ['perc', 'shaker', 'tamb', 'conga', 'bongo', 'clave', 'rim', 'block', 'timbale']
-    FX = ['fx', 'sfx', 'riser', 'fall', 'downer', 'whoosh', 'impact', 'hit', 'transition', 'sweep', 'braam', 'zap']
-    MELODIC = ['bass', 'synth', 'pad', 'lead', 'pluck', 'keys', 'piano', 'guitar', 'strings', 'vox', 'vocal', 'chord', 'arp']
-    AMBIENCE = ['ambience', 'amb', 'drone', 'texture']
+    if 'MIDI' in tags: return 'MIDI'
+    if 'STEMS' in tags: return 'Stems'
+    if 'FX' in tags: return 'Sound Effects (FX)'
+    if 'AMBIENCE' in tags: return 'Ambience'
 
-    if 'midi' in path_lower: return 'MIDI'
-    if 'stem' in path_lower or '!stems' in path_lower: return 'Stems'
-    if any(k in path_lower for k in FX): return 'Sound Effects (FX)'
-    if any(k in path_lower for k in AMBIENCE): return 'Ambience'
+    is_loop = 'LOOP' in tags
 
-    is_loop = 'loop' in path_lower or 'bpm' in path_lower
-
-    if any(k in path_lower for k in DRUMS):
+    if 'DRUMS' in tags:
         return 'Drum Loops' if is_loop else 'Drums'
 
-    if any(k in path_lower for k in PERCUSSION):
+    if 'PERCUSSION' in tags:
         return 'Percussion Loops' if is_loop else 'Percussion'
 
-    if any(k in path_lower for k in MELODIC):
+    if 'MELODIC' in tags:
         return 'Melodic Loops' if is_loop else 'Melodic One-Shots'
 
     if is_loop: return 'Loops' # Generic loop category
@@ -63,6 +150,71 @@ def get_category_from_path(path):
     return 'Uncategorized'
 
 
+def walk_audio(base_dir):
+    """
+    Recursively yields a DirEntry for every audio file under base_dir, in the
+    same order as os.walk. Built on os.scandir so the file/folder checks reuse
+    the data from the directory read instead of a stat call per entry.
+    """
+    stack = [base_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue # Skip unreadable folders, like os.walk does
+
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                # Like os.walk, don't descend into symlinked folders
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                yield entry
+        stack.extend(reversed(subdirs))
+
+
+@functools.lru_cache(maxsize=4096)
+def get_pack_name(root):
+    """Returns the cleaned name of the pack folder that root belongs to. Cached per folder."""
+    relative_path = os.path.relpath(root, SOURCE_BASE_DIR)
+    path_parts = relative_path.replace('\\', '/').split('/')
+    return clean_name(path_parts[0] if path_parts[0] != '.' else 'UnknownPack')
+
+def reserve_destination(dest_dir, filename):
+    """
+    Claims a free path for filename inside dest_dir by atomically creating an
+    empty placeholder, adding a counter to the name on collisions.
+    """
+    name, ext = os.path.splitext(filename)
+    candidate = filename
+    counter = 1
+    while True:
+        path = os.path.join(dest_dir, candidate)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            candidate = f"{name}_{counter}{ext}"
+            counter += 1
+
+
+def move_file(src, dst):
+    """
+    Moves src onto its reserved destination. Within one filesystem that is a
+    single rename; files on another device, like an external or network drive
+    mounted inside the library, fall back to shutil's copy-and-delete.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
 def organize_library():
     """Main function to scan, parse, rename, and move audio files."""
     if not os.path.exists(DEST_DIR):
@@ -74,55 +226,55 @@ def organize_library():
         return
 
     file_count = 0
+    created_dirs = set()
     print(f"Scanning source folder: {SOURCE_BASE_DIR}...")
 
-    for root, _, files in os.walk(SOURCE_BASE_DIR):
-        for filename in files:
-            if filename.startswith('.') or not filename.lower().endswith(('.wav', '.aif', '.mp3', '.mid')):
-                continue
-
-            original_full_path = os.path.join(root, filename)
-            path_for_parsing = original_full_path.replace('\\', '/')
-
-            category = get_category_from_path(path_for_parsing)
-            bpm, key = parse_metadata(path_for_parsing)
-
-            relative_path = os.path.relpath(root, SOURCE_BASE_DIR)
-            path_parts = relative_path.replace('\\', '/').split('/')
-            pack_name = clean_name(path_parts[0] if path_parts[0] != '.' else 'UnknownPack')
-            sample_name = clean_name(os.path.splitext(filename)[0])
-
-            # Further clean the sample name
-            if bpm: sample_name = re.sub(r'\d{2,3}\s?bpm', '', sample_name, flags=re.IGNORECASE).strip()
-            if key: sample_name = re.sub(r'\b[A-G][#b]?\s?(min|maj|minor|major)?\b', '', sample_name, flags=re.IGNORECASE).strip()
-            sample_name = re.sub(r'_\s?([A-G][#b]?)\s?_', '', sample_name).strip()
-            sample_name = re.sub(r'\s+', ' ', sample_name).strip()
-
-            new_filename_parts = [pack_name, sample_name]
-            if bpm: new_filename_parts.append(bpm)
-            if key: new_filename_parts.append(key)
-
-            extension = os.path.splitext(filename)[1]
-            new_filename = '_'.join(part for part in new_filename_parts if part) + extension
-            new_filename = new_filename.replace(' ', '_').replace('#', 's')
-
-            dest_category_path = os.path.join(DEST_DIR, category)
-            if not os.path.exists(dest_category_path):
-                os.makedirs(dest_category_path)
-
-            new_full_path = os.path.join(dest_category_path, new_filename)
-
-            try:
-                counter = 1
-                while os.path.exists(new_full_path):
-                    name, ext = os.path.splitext(new_filename)
-                    new_full_path = os.path.join(dest_category_path, f"{name}_{counter}{ext}")
-                    counter += 1
-                shutil.move(original_full_path, new_full_path)
-                print(f"Moved: {filename} -> {category}/{os.path.basename(new_full_path)}")
-                file_count += 1
-            except Exception as e:
-                print(f"Error moving {filename}: {e}")
+    for entry in walk_audio(SOURCE_BASE_DIR):
+        filename = entry.name
+        if filename[0] == '.':
+            continue
+
+        root = os.path.dirname(entry.path)
+        original_full_path = entry.path
+        path_for_parsing = original_full_path.replace('\\', '/')
+
+        category = get_category_from_path(path_for_parsing)
+        bpm, key = parse_metadata(path_for_parsing)
+
+        pack_name = get_pack_name(root)
+        sample_name = clean_name(os.path.splitext(filename)[0])
+
+        # Further clean the sample name
+        cleanup_re = _CLEANUP_RES[bool(bpm), bool(key)]
+        sample_name = _WS_RE.sub(' ', cleanup_re.sub('', sample_name)).strip()
+
+        new_filename_parts = [pack_name, sample_name]
+        if bpm: new_filename_parts.append(bpm)
+        if key: new_filename_parts.append(key)
+
+        extension = os.path.splitext(filename)[1]
+        new_filename = '_'.join(part for part in new_filename_parts if part) + extension
+        new_filename = new_filename.replace(' ', '_').replace('#', 's')
+
+        dest_category_path = os.path.join(DEST_DIR, category)
+        if dest_category_path not in created_dirs:
+            os.makedirs(dest_category_path, exist_ok=True)
+            created_dirs.add(dest_category_path)
+
+        new_full_path = None
+        try:
+            new_full_path = reserve_destination(dest_category_path, new_filename)
+            move_file(original_full_path, new_full_path)
+            print(f"Moved: {filename} -> {category}/{os.path.basename(new_full_path)}")
+            file_count += 1
+        except Exception as e:
+            print(f"Error moving {filename}: {e}")
+            # Don't leave the placeholder behind
+            if new_full_path:
+                try:
+                    os.remove(new_full_path)
+                except OSError:
+                    pass
 
     print(f"\nOrganization complete! Moved {file_count} new files to '{DEST_DIR}'.")
 
@@ -1,3 +1,5 @@
+import errno
+import functools
 import os
 import shutil
 import re
@@ -9,11 +11,25 @@ SOURCE_BASE_DIR = './New_samples'
 DEST_DIR = './Organized_Library'
 # --- End Configuration ---
 
+# File types that will be organized
+AUDIO_EXTENSIONS = frozenset({'.wav', '.aif', '.mp3', '.mid'})
+
+# Patterns used for parsing and cleaning names, compiled once
+_BPM_WS_RE = re.compile(r'(\d{2,3})\s?BPM', re.IGNORECASE)
+_BPM_US_RE = re.compile(r'_(\d{2,3})_')
+_KEY_RE = re.compile(r'\b([A-G][#b]?)\s?(min|maj|minor|major)?\b', re.IGNORECASE)
+_BPM_STRIP_RE = re.compile(r'\d{2,3}\s?bpm', re.IGNORECASE)
+_KEY_STRIP_RE = re.compile(r'\b[A-G][#b]?\s?(min|maj|minor|major)?\b', re.IGNORECASE)
+_UNDERSCORE_KEY_RE = re.compile(r'_\s?([A-G][#b]?)\s?_')
+_UNDERSCORE_BPM_RE = re.compile(r'_\s?\d{2,3}\s?_')
+_WS_RE = re.compile(r'\s+')
+# Drops @!() and turns _ and - into spaces in one pass
+_NAME_CHARS = str.maketrans({'@': None, '!': None, '(': None, ')': None, '_': ' ', '-': ' '})
+
 def clean_name(name):
     """Removes special characters and extra spaces from a string."""
-    name = re.sub(r'[@!()]', '', name) # Remove @, !, (, )
-    name = name.replace('_', ' ').replace('-', ' ') # Replace underscores and hyphens with spaces
-    name = re.sub(r'\s+', ' ', name).strip() # Replace multiple spaces with a single one
+    name = name.translate(_NAME_CHARS) # Remove @, !, (, ) and turn underscores and hyphens into spaces
+    name = _WS_RE.sub(' ', name).strip() # Replace multiple spaces with a single one
     return name
 
 def parse_metadata(path_string):
@@ -26,20 +42,18 @@ def parse_metadata(path_string):
 
     # --- BPM Patterns ---
     # Matches "120 BPM", "150BPM", "128_BPM" etc.
-    bpm_match = re.search(r'(\d{2,3})\s?BPM', path_string, re.IGNORECASE)
+    bpm_match = _BPM_WS_RE.search(path_string)
     if bpm_match:
         bpm = f"{bpm_match.group(1)}bpm"
     else:
         # Matches numbers like "_150_" which often imply BPM
-        bpm_match_underscore = re.search(r'_(\d{2,3})_', path_string)
+        bpm_match_underscore = _BPM_US_RE.search(path_string)
         if bpm_match_underscore:
             bpm = f"{bpm_match_underscore.group(1)}bpm"
 
     # --- Key Patterns ---
     # Matches "C#min", "Fmaj", "G Minor", "Db Major", or just "_F#_"
-    key_match = re.search(
-        r'\b([A-G][#b]?)\s?(min|maj|minor|major)?\b', path_string, re.IGNORECASE
-    )
+    key_match = _KEY_RE.search(path_string)
     if key_match:
         note = key_match.group(1).replace('b', 'b').replace('#', '#')
         mode = (key_match.group(2) or "").lower()
@@ -67,6 +81,78 @@ def get_category_from_path(path):
     return 'Uncategorized'
 
 
+def walk_audio(base_dir):
+    """
+    Recursively yields a DirEntry for every audio file under base_dir, in the
+    same order as os.walk. Built on os.scandir so the file/folder checks reuse
+    the data from the directory read instead of a stat call per entry.
+    """
+    stack = [base_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue # Skip unreadable folders, like os.walk does
+
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                # Like os.walk, don't descend into symlinked folders
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                yield entry
+        stack.extend(reversed(subdirs))
+
+
+@functools.lru_cache(maxsize=4096)
+def get_folder_info(root):
+    """
+    Returns (pack_name, bpm, key) for a source folder. Every file in a folder
+    shares these, so they are cached per folder.
+    """
+    # Correctly get the pack name relative to the SOURCE_BASE_DIR
+    relative_path = os.path.relpath(root, SOURCE_BASE_DIR)
+    path_parts = relative_path.replace('\\', '/').split('/')
+    pack_name = clean_name(path_parts[0] if path_parts[0] != '.' else 'UnknownPack')
+
+    bpm, key = parse_metadata(root)
+    return pack_name, bpm, key
+
+def reserve_destination(dest_dir, filename):
+    """
+    Claims a free path for filename inside dest_dir by atomically creating an
+    empty placeholder, adding a counter to the name on collisions.
+    """
+    name, ext = os.path.splitext(filename)
+    candidate = filename
+    counter = 1
+    while True:
+        path = os.path.join(dest_dir, candidate)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            candidate = f"{name}_{counter}{ext}"
+            counter += 1
+
+
+def move_file(src, dst):
+    """
+    Moves src onto its reserved destination. Within one filesystem that is a
+    single rename; files on another device, like an external or network drive
+    mounted inside the library, fall back to shutil's copy-and-delete.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
 def organize_library():
     """
     Main function to scan, parse, rename, and move audio files
@@ -77,6 +163,7 @@ def organize_library():
         print(f"Created destination directory: {DEST_DIR}")
 
     file_count = 0
+    created_dirs = set()
 
     print(f"Scanning source folder: {SOURCE_BASE_DIR}...")
 
@@ -85,78 +172,72 @@ def organize_library():
         print(f"Error: Source directory '{SOURCE_BASE_DIR}' not found.")
         return
 
-    for root, _, files in os.walk(SOURCE_BASE_DIR):
-        for filename in files:
-            # Process only common audio and MIDI file types
-            if not filename.lower().endswith(('.wav', '.aif', '.mp3', '.mid')):
-                continue
-
-            original_full_path = os.path.join(root, filename)
-            path_for_parsing = original_full_path.replace('\\', '/')
-
-            # --- 1. Determine Category ---
-            category = get_category_from_path(path_for_parsing)
-
-            # --- 2. Extract Metadata ---
-            bpm_file, key_file = parse_metadata(filename)
-            bpm_folder, key_folder = parse_metadata(root)
-
-            final_bpm = bpm_file or bpm_folder
-            final_key = key_file or key_folder
-
-            # --- 3. Determine Pack and Sample Name ---
-            # Correctly get the pack name relative to the SOURCE_BASE_DIR
-            relative_path = os.path.relpath(root, SOURCE_BASE_DIR)
-            path_parts = relative_path.replace('\\', '/').split('/')
-            pack_name = clean_name(path_parts[0] if path_parts[0] != '.' else 'UnknownPack')
-            sample_name = clean_name(os.path.splitext(filename)[0])
-
-            # Clean up sample name by removing metadata that we've already parsed
-            if final_bpm:
-                sample_name = re.sub(r'\d{2,3}\s?bpm', '', sample_name, flags=re.IGNORECASE).strip()
-            if final_key:
-                sample_name = re.sub(r'\b[A-G][#b]?\s?(min|maj|minor|major)?\b', '', sample_name, flags=re.IGNORECASE).strip()
-
-            sample_name = re.sub(r'_\s?([A-G][#b]?)\s?_', '', sample_name).strip() # remove _F_
-            sample_name = re.sub(r'_\s?\d{2,3}\s?_', '', sample_name).strip() # remove _150_
-            sample_name = re.sub(r'\s+', ' ', sample_name).strip()
-
-
-            # --- 4. Construct New Filename and Path ---
-            new_filename_parts = [pack_name, sample_name]
-            if final_bpm:
-                new_filename_parts.append(final_bpm)
-            if final_key:
-                new_filename_parts.append(final_key)
-
-            extension = os.path.splitext(filename)[1]
-            new_filename = '_'.join(part for part in new_filename_parts if part) + extension
-            new_filename = new_filename.replace(' ', '_').replace('#', 's')
-
-            dest_category_path = os.path.join(DEST_DIR, category)
-            if not os.path.exists(dest_category_path):
-                os.makedirs(dest_category_path)
-
-            new_full_path = os.path.join(dest_category_path, new_filename)
-
-            # --- 5. Move and Rename the File ---
-            try:
-                if not os.path.exists(new_full_path):
-                    shutil.move(original_full_path, new_full_path)
-                    print(f"Moved: {filename} -> {category}/{new_filename}")
-                    file_count += 1
-                else:
-                    # Handle potential filename collisions by adding a number
-                    counter = 1
-                    while os.path.exists(new_full_path):
-                        name, ext = os.path.splitext(new_filename)
-                        new_full_path = os.path.join(dest_category_path, f"{name}_{counter}{ext}")
-                        counter += 1
-                    shutil.move(original_full_path, new_full_path)
-                    print(f"Moved (renamed): {filename} -> {os.path.basename(new_full_path)}")
-                    file_count += 1
-            except Exception as e:
-                print(f"Error moving {filename}: {e}")
+    for entry in walk_audio(SOURCE_BASE_DIR):
+        # walk_audio only yields common audio and MIDI file types
+        filename = entry.name
+        root = os.path.dirname(entry.path)
+        original_full_path = entry.path
+        path_for_parsing = original_full_path.replace('\\', '/')
+
+        # --- 1. Determine Category ---
+        category = get_category_from_path(path_for_parsing)
+
+        # --- 2. Extract Metadata ---
+        pack_name, bpm_folder, key_folder = get_folder_info(root)
+        bpm_file, key_file = parse_metadata(filename)
+
+        final_bpm = bpm_file or bpm_folder
+        final_key = key_file or key_folder
+
+        # --- 3. Determine Sample Name ---
+        sample_name = clean_name(os.path.splitext(filename)[0])
+
+        # Clean up sample name by removing metadata that we've already parsed
+        if final_bpm:
+            sample_name = _BPM_STRIP_RE.sub('', sample_name).strip()
+        if final_key:
+            sample_name = _KEY_STRIP_RE.sub('', sample_name).strip()
+
+        sample_name = _UNDERSCORE_KEY_RE.sub('', sample_name).strip() # remove _F_
+        sample_name = _UNDERSCORE_BPM_RE.sub('', sample_name).strip() # remove _150_
+        sample_name = _WS_RE.sub(' ', sample_name).strip()
+
+
+        # --- 4. Construct New Filename and Path ---
+        new_filename_parts = [pack_name, sample_name]
+        if final_bpm:
+            new_filename_parts.append(final_bpm)
+        if final_key:
+            new_filename_parts.append(final_key)
+
+        extension = os.path.splitext(filename)[1]
+        new_filename = '_'.join(part for part in new_filename_parts if part) + extension
+        new_filename = new_filename.replace(' ', '_').replace('#', 's')
+
+        dest_category_path = os.path.join(DEST_DIR, category)
+        if dest_category_path not in created_dirs:
+            os.makedirs(dest_category_path, exist_ok=True)
+            created_dirs.add(dest_category_path)
+
+        # --- 5. Move and Rename the File ---
+        new_full_path = None
+        try:
+            # Handle potential filename collisions by adding a number
+            new_full_path = reserve_destination(dest_category_path, new_filename)
+            move_file(original_full_path, new_full_path)
+            if os.path.basename(new_full_path) == new_filename:
+                print(f"Moved: {filename} -> {category}/{new_filename}")
+            else:
+                print(f"Moved (renamed): {filename} -> {os.path.basename(new_full_path)}")
+            file_count += 1
+        except Exception as e:
+            print(f"Error moving {filename}: {e}")
+            # Don't leave the placeholder behind
+            if new_full_path:
+                try:
+                    os.remove(new_full_path)
+                except OSError:
+                    pass
 
     print(f"\nOrganization complete! Moved {file_count} new files to '{DEST_DIR}'.")
 